@@ -8,11 +8,18 @@ to manage users, groups, spaces, and content with proper permissions.
 import requests
 import json
 import time
-from typing import Dict, List, Optional, Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Any, Callable, Iterable
 from urllib.parse import urljoin
 import os
 from dotenv import load_dotenv
 
+import jsonutil
+from events import ConsoleRenderer, EventStream, MAX_ERROR_LENGTH
+from profiling import TimedHTTPAdapter, connect_time, profile_worker, reset_connect_time
+from singleflight import SingleFlight
+from transport import HTTPTransport
+
 # Load environment variables
 load_dotenv()
 
@@ -20,7 +27,12 @@ load_dotenv()
 class ConfluenceClient:
     """Client for Confluence Cloud REST API operations."""
     
-    def __init__(self, base_url: str = None, email: str = None, api_token: str = None):
+    # Placeholder site used when replaying a recording without configuration
+    OFFLINE_BASE_URL = 'https://offline.invalid'
+    
+    def __init__(self, base_url: str = None, email: str = None, api_token: str = None,
+                 transport=None, coalesce_reads: bool = True, events: EventStream = None,
+                 profile: bool = False):
         """
         Initialize the Confluence client.
         
@@ -28,12 +40,23 @@ class ConfluenceClient:
             base_url: Confluence Cloud site URL
             email: User email for authentication
             api_token: API token for authentication
+            transport: Transport used to send requests, or a factory called
+                with the authenticated session (defaults to HTTPTransport)
+            coalesce_reads: Merge concurrent identical GET requests into one.
+                Always off for transports that record or replay requests,
+                so recordings stay deterministic
+            events: Event stream receiving one event per request (defaults
+                to a stream rendering failures to the console)
+            profile: Report a per-part timing breakdown for each request
         """
         self.base_url = base_url or os.getenv('CONFLUENCE_URL')
         self.email = email or os.getenv('CONFLUENCE_EMAIL')
         self.api_token = api_token or os.getenv('CONFLUENCE_API_TOKEN')
         
-        if not all([self.base_url, self.email, self.api_token]):
+        if getattr(transport, 'offline', False):
+            # Replayed runs never reach the network, so credentials are optional
+            self.base_url = self.base_url or self.OFFLINE_BASE_URL
+        elif not all([self.base_url, self.email, self.api_token]):
             raise ValueError("Missing required configuration. Please check your environment variables.")
         
         # Ensure base_url doesn't end with slash
@@ -46,6 +69,18 @@ class ConfluenceClient:
             'Accept': 'application/json',
             'Content-Type': 'application/json'
         })
+        
+        if transport is None:
+            transport = HTTPTransport
+        self.transport = transport(self.session) if callable(transport) else transport
+        if coalesce_reads and getattr(self.transport, 'coalesce_reads', True):
+            self._single_flight = SingleFlight()
+        else:
+            self._single_flight = None
+        self.events = events if events is not None else EventStream([ConsoleRenderer()])
+        self.profile = False
+        if profile:
+            self.enable_profiling()
     
     def _make_request(self, method: str, endpoint: str, **kwargs) -> Dict[str, Any]:
         """
@@ -57,7 +92,8 @@ class ConfluenceClient:
             **kwargs: Additional arguments for requests
             
         Returns:
-            Response data as dictionary
+            Response data as dictionary. Concurrent identical GET requests
+            share one response object, which must not be modified.
         """
         # Confluence Cloud API uses /wiki/rest/api/ prefix
         if not endpoint.startswith('/wiki/rest/api/'):
@@ -67,15 +103,110 @@ class ConfluenceClient:
                 endpoint = '/wiki/rest/api' + endpoint
         url = urljoin(self.base_url + '/', endpoint)
         
+        # Merge concurrent identical reads into a single request
+        if self._single_flight is not None and method.upper() == 'GET' and set(kwargs) <= {'params'}:
+            params = kwargs.get('params') or {}
+            key = (url, tuple(sorted(params.items())))
+            return self._single_flight.do(key, lambda: self._send(method, url, **kwargs))
+        return self._send(method, url, **kwargs)
+    
+    def _send(self, method: str, url: str, **kwargs) -> Dict[str, Any]:
+        """
+        Send a request through the transport and decode the response.
+        
+        Args:
+            method: HTTP method
+            url: Full request URL
+            **kwargs: Additional arguments for requests
+            
+        Returns:
+            Response data as dictionary
+        """
+        start = time.perf_counter()
+        
+        # Encode payloads with the fastest available JSON backend
+        if kwargs.get('json') is not None:
+            kwargs['data'] = jsonutil.dumps(kwargs.pop('json'))
+        encoded = time.perf_counter()
+        
+        response = None
+        reset_connect_time()
         try:
-            response = self.session.request(method, url, **kwargs)
+            response = self.transport.request(method, url, **kwargs)
+            received = time.perf_counter()
             response.raise_for_status()
-            return response.json() if response.content else {}
+            data = jsonutil.loads(response.content) if response.content else {}
         except requests.exceptions.RequestException as e:
-            print(f"API request failed: {e}")
-            if hasattr(e, 'response') and e.response is not None:
-                print(f"Response content: {e.response.text}")
+            if getattr(e, 'response', None) is not None:
+                response = e.response
+            self.events.emit('request', method, url, 'error', time.perf_counter() - start,
+                             http_status=response.status_code if response is not None else None,
+                             error=str(e)[:MAX_ERROR_LENGTH],
+                             response=response.text[:MAX_ERROR_LENGTH] if response is not None else None)
             raise
+        end = time.perf_counter()
+        
+        fields = {'http_status': response.status_code}
+        if self.profile:
+            # response.elapsed covers connecting, sending and waiting for the headers
+            connect = connect_time()
+            headers = response.elapsed.total_seconds()
+            fields['timings'] = {
+                'encode': encoded - start,
+                'connect': connect,
+                'server': max(headers - connect, 0.0),
+                'transfer': max(received - encoded - headers, 0.0),
+                'parse': end - received
+            }
+        self.events.emit('request', method, url, 'ok', end - start, **fields)
+        return data
+    
+    def enable_profiling(self) -> None:
+        """
+        Split the time of each request into encode, connect, server,
+        transfer and parse, reported as 'timings' on request events.
+        
+        Does nothing if profiling is already enabled.
+        """
+        if self.profile:
+            return
+        self.profile = True
+        adapter = TimedHTTPAdapter()
+        for prefix in ('https://', 'http://'):
+            # Close the replaced adapter so its connection pools are released
+            replaced = self.session.adapters.get(prefix)
+            self.session.mount(prefix, adapter)
+            if replaced is not None and replaced is not adapter:
+                replaced.close()
+    
+    def _run_concurrently(self, fn: Callable[[Any], Any], items: List[Any],
+                          max_workers: int) -> List[Any]:
+        """
+        Call ``fn`` for each item in a thread pool, reporting queue waits.
+        
+        Args:
+            fn: Function to call for each item
+            items: Items to process
+            max_workers: Maximum number of worker threads
+            
+        Returns:
+            Results in the order of ``items``
+        """
+        if not items:
+            return []
+        def run(item: Any, submitted: float) -> Any:
+            self.events.emit('wait', 'queue', str(item), duration=time.perf_counter() - submitted)
+            with profile_worker():
+                return fn(item)
+        
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as executor:
+            futures = [executor.submit(run, item, time.perf_counter()) for item in items]
+            return [future.result() for future in futures]
+    
+    @staticmethod
+    def _expand_params(expand: Optional[str]) -> Optional[Dict[str, str]]:
+        """Build query parameters limiting the response to the given expansions."""
+        return {'expand': expand} if expand is not None else None
     
     def create_user(self, username: str, email: str, display_name: str, 
                    is_admin: bool = False) -> Dict[str, Any]:
@@ -150,7 +281,6 @@ class ConfluenceClient:
             # Try to get user info using accountId or email
             # Since username parameter doesn't work, we'll assume users exist
             # if they were created manually in the admin console
-            print(f"  ⚠️ Cannot verify user '{username}' via API - assuming user exists")
             return True
         except:
             return False
@@ -182,7 +312,8 @@ class ConfluenceClient:
         data = {'username': username}
         return self._make_request('POST', f'/rest/api/group/{group_name}/member', json=data)
     
-    def create_space(self, space_key: str, name: str, description: str = "") -> Dict[str, Any]:
+    def create_space(self, space_key: str, name: str, description: str = "",
+                     expand: str = None) -> Dict[str, Any]:
         """
         Create a new space.
         
@@ -190,6 +321,7 @@ class ConfluenceClient:
             space_key: Unique key for the space
             name: Display name of the space
             description: Description of the space
+            expand: Comma-separated properties to expand in the response
             
         Returns:
             Created space information
@@ -199,11 +331,128 @@ class ConfluenceClient:
             'name': name,
             'description': {'value': description, 'representation': 'storage'}
         }
-        return self._make_request('POST', '/rest/api/space', json=data)
+        return self._make_request('POST', '/rest/api/space', json=data,
+                                  params=self._expand_params(expand))
     
+    def delete_space(self, space_key: str, wait: bool = True,
+                     timeout: float = 300.0) -> Dict[str, Any]:
+        """
+        Delete a space.
+        
+        Confluence deletes spaces as a long-running task. When ``wait`` is
+        True the task is polled with exponential backoff until it finishes.
+        
+        Args:
+            space_key: Key of the space to delete
+            wait: Whether to wait for the deletion task to finish
+            timeout: Maximum number of seconds to wait for the task
+            
+        Returns:
+            Long-running task information
+        """
+        task = self._make_request('DELETE', f'/rest/api/space/{space_key}')
+        if not wait or not task.get('id'):
+            return task
+        return self.wait_for_long_task(task['id'], timeout=timeout)
+    
+    def delete_spaces(self, space_keys: Iterable[str], max_workers: int = 5,
+                      timeout: float = 300.0,
+                      on_result: Callable[[str, Dict[str, Any]], None] = None
+                      ) -> Dict[str, Dict[str, Any]]:
+        """
+        Delete several spaces concurrently.
+        
+        All deletions are started at once and each long-running task is
+        polled with backoff in its own worker.
+        
+        Args:
+            space_keys: Keys of the spaces to delete
+            max_workers: Maximum number of concurrent deletions
+            timeout: Maximum number of seconds to wait for each task
+            on_result: Called from the worker with the space key and its
+                result as soon as that space's deletion has finished
+            
+        Returns:
+            Mapping of space key to a result with 'status' ('deleted',
+            'missing' or 'failed'), 'duration' in seconds and either
+            'task' or 'error'
+        """
+        def delete(space_key: str) -> Dict[str, Any]:
+            start = time.perf_counter()
+            try:
+                task = self.delete_space(space_key, wait=False)
+            except requests.exceptions.HTTPError as e:
+                # Only a 404 on the deletion itself means the space is absent
+                if e.response is not None and e.response.status_code == 404:
+                    result = {'status': 'missing'}
+                else:
+                    result = {'status': 'failed', 'error': str(e)}
+            except Exception as e:
+                result = {'status': 'failed', 'error': str(e)}
+            else:
+                try:
+                    if task.get('id'):
+                        task = self.wait_for_long_task(task['id'], timeout=timeout)
+                    result = {'status': 'deleted', 'task': task}
+                except Exception as e:
+                    result = {'status': 'failed', 'error': str(e)}
+            result['duration'] = time.perf_counter() - start
+            if on_result is not None:
+                on_result(space_key, result)
+            return result
+        
+        space_keys = list(space_keys)
+        results = self._run_concurrently(delete, space_keys, max_workers)
+        return dict(zip(space_keys, results))
+    
+    def get_long_task(self, task_id: str) -> Dict[str, Any]:
+        """
+        Get the status of a long-running task.
+        
+        Args:
+            task_id: Long-running task ID
+            
+        Returns:
+            Task status information
+        """
+        return self._make_request('GET', f'/rest/api/longtask/{task_id}')
+    
+    def wait_for_long_task(self, task_id: str, timeout: float = 300.0,
+                           initial_delay: float = 0.5,
+                           max_delay: float = 10.0) -> Dict[str, Any]:
+        """
+        Poll a long-running task until it finishes.
+        
+        The delay between polls starts at ``initial_delay`` and doubles up
+        to ``max_delay``.
+        
+        Args:
+            task_id: Long-running task ID
+            timeout: Maximum number of seconds to wait
+            initial_delay: Delay before the first poll
+            max_delay: Upper bound for the delay between polls
+            
+        Returns:
+            Final task status information
+        """
+        deadline = time.monotonic() + timeout
+        delay = initial_delay
+        while True:
+            waited = time.perf_counter()
+            self.transport.sleep(min(delay, max(deadline - time.monotonic(), 0)))
+            self.events.emit('wait', 'poll', task_id, duration=time.perf_counter() - waited)
+            task = self.get_long_task(task_id)
+            if task.get('finished') or task.get('percentageComplete', 0) >= 100:
+                if task.get('successful') is False:
+                    messages = [m.get('translation') or m.get('key') for m in task.get('messages', [])]
+                    raise RuntimeError(f"Long-running task {task_id} failed: {messages}")
+                return task
+            if time.monotonic() >= deadline:
+                raise TimeoutError(f"Long-running task {task_id} did not finish within {timeout}s")
+            delay = min(delay * 2, max_delay)
     
     def create_page(self, space_key: str, title: str, content: str, 
-                   parent_id: str = None) -> Dict[str, Any]:
+                   parent_id: str = None, expand: str = None) -> Dict[str, Any]:
         """
         Create a new page.
         
@@ -212,6 +461,7 @@ class ConfluenceClient:
             title: Page title
             content: Page content in Confluence storage format
             parent_id: ID of parent page (optional)
+            expand: Comma-separated properties to expand in the response
             
         Returns:
             Created page information
@@ -231,9 +481,11 @@ class ConfluenceClient:
         if parent_id:
             data['ancestors'] = [{'id': parent_id}]
         
-        return self._make_request('POST', '/rest/api/content', json=data)
+        return self._make_request('POST', '/rest/api/content', json=data,
+                                  params=self._expand_params(expand))
     
-    def create_blog_post(self, space_key: str, title: str, content: str) -> Dict[str, Any]:
+    def create_blog_post(self, space_key: str, title: str, content: str,
+                         expand: str = None) -> Dict[str, Any]:
         """
         Create a new blog post.
         
@@ -241,6 +493,7 @@ class ConfluenceClient:
             space_key: Space key where blog post will be created
             title: Blog post title
             content: Blog post content in Confluence storage format
+            expand: Comma-separated properties to expand in the response
             
         Returns:
             Created blog post information
@@ -257,29 +510,110 @@ class ConfluenceClient:
             }
         }
         
-        return self._make_request('POST', '/rest/api/content', json=data)
+        return self._make_request('POST', '/rest/api/content', json=data,
+                                  params=self._expand_params(expand))
     
     
-    def get_space(self, space_key: str) -> Dict[str, Any]:
+    def get_space(self, space_key: str, expand: str = None) -> Dict[str, Any]:
         """
         Get space information.
         
         Args:
             space_key: Space key
+            expand: Comma-separated properties to expand in the response
             
         Returns:
             Space information
         """
-        return self._make_request('GET', f'/rest/api/space/{space_key}')
+        return self._make_request('GET', f'/rest/api/space/{space_key}',
+                                  params=self._expand_params(expand))
     
-    def get_content(self, content_id: str) -> Dict[str, Any]:
+    def get_content(self, content_id: str, expand: str = None) -> Dict[str, Any]:
         """
         Get content information.
         
         Args:
             content_id: Content ID
+            expand: Comma-separated properties to expand in the response
             
         Returns:
             Content information
         """
-        return self._make_request('GET', f'/rest/api/content/{content_id}')
+        return self._make_request('GET', f'/rest/api/content/{content_id}',
+                                  params=self._expand_params(expand))
+    
+    def delete_content(self, content_id: str, purge: bool = False) -> None:
+        """
+        Delete content, moving it to the space trash.
+        
+        Args:
+            content_id: Content ID
+            purge: Also purge the content from the trash
+        """
+        self._make_request('DELETE', f'/rest/api/content/{content_id}')
+        if purge:
+            self.purge_content(content_id)
+    
+    def purge_content(self, content_id: str) -> None:
+        """
+        Permanently remove trashed content.
+        
+        Args:
+            content_id: ID of content that is already in the trash
+        """
+        self._make_request('DELETE', f'/rest/api/content/{content_id}',
+                           params={'status': 'trashed'})
+    
+    def get_trashed_content(self, space_key: str, content_type: str = 'page',
+                            limit: int = 100) -> List[Dict[str, Any]]:
+        """
+        Get all trashed content of one type in a space.
+        
+        Args:
+            space_key: Space key
+            content_type: Content type ('page' or 'blogpost')
+            limit: Page size for each request
+            
+        Returns:
+            List of trashed content
+        """
+        results = []
+        start = 0
+        while True:
+            data = self._make_request('GET', '/rest/api/content', params={
+                'spaceKey': space_key,
+                'type': content_type,
+                'status': 'trashed',
+                'start': start,
+                'limit': limit
+            })
+            batch = data.get('results', [])
+            results.extend(batch)
+            if not batch or 'next' not in data.get('_links', {}):
+                return results
+            start += len(batch)
+    
+    def purge_trash(self, space_key: str, max_workers: int = 5) -> Dict[str, Any]:
+        """
+        Purge all trashed pages and blog posts in a space concurrently.
+        
+        Args:
+            space_key: Space key
+            max_workers: Maximum number of concurrent purge requests
+            
+        Returns:
+            Summary with 'purged' count and list of 'failed' content IDs
+        """
+        content_ids = [item['id'] for content_type in ('page', 'blogpost')
+                       for item in self.get_trashed_content(space_key, content_type)]
+        
+        def purge(content_id: str) -> bool:
+            try:
+                self.purge_content(content_id)
+                return True
+            except requests.exceptions.RequestException:
+                return False
+        
+        outcomes = self._run_concurrently(purge, content_ids, max_workers)
+        failed = [cid for cid, ok in zip(content_ids, outcomes) if not ok]
+        return {'purged': len(content_ids) - len(failed), 'failed': failed}
@@ -0,0 +1,369 @@
+"""
+Structured event stream for Confluence setup runs
+
+This module replaces per-operation print statements with structured events.
+An EventStream dispatches each event to its listeners: a buffered JSONL sink,
+a live progress display and a human-readable console renderer.
+"""
+
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, TextIO
+
+import jsonutil
+
+# Longest error text kept on an event
+MAX_ERROR_LENGTH = 300
+
+
+def error_text(error: Any) -> str:
+    """
+    Return the message of an error together with the server's response body.
+    
+    str() of a requests HTTPError only holds the status and URL; the reason
+    (e.g. "Group already exists") is in the response body.
+    """
+    text = str(error)
+    response = getattr(error, 'response', None)
+    if response is not None and response.text:
+        text = f"{text}: {response.text}"
+    return text
+
+
+class Operation:
+    """Mutable state of an operation, emitted when it finishes."""
+    
+    __slots__ = ('status', 'fields')
+    
+    def __init__(self):
+        self.status = 'ok'
+        self.fields: Dict[str, Any] = {}
+    
+    def set(self, **fields) -> None:
+        """Attach fields (e.g. created IDs) to the event."""
+        self.fields.update(fields)
+    
+    def fail(self, error: Any = None, status: str = 'error') -> None:
+        """
+        Mark the operation as unsuccessful.
+        
+        Args:
+            error: Exception or message describing the failure
+            status: Event status (e.g. 'error', 'exists', 'missing')
+        """
+        self.status = status
+        if error is not None:
+            self.fields['error'] = error_text(error)[:MAX_ERROR_LENGTH]
+
+
+class EventStream:
+    """Dispatches structured events to listeners."""
+    
+    def __init__(self, listeners: List[Any] = None):
+        """
+        Initialize the stream.
+        
+        Args:
+            listeners: Objects with handle(event) and close() methods
+        """
+        self.listeners = list(listeners or [])
+        self.phase_name: Optional[str] = None
+        self._lock = threading.Lock()
+    
+    def emit(self, kind: str, operation: str = None, target: str = None,
+             status: str = 'ok', duration: float = None, **fields) -> None:
+        """
+        Emit an event to all listeners.
+        
+        Args:
+            kind: Event kind ('run', 'phase', 'op' or 'request')
+            operation: Operation name (e.g. 'create_space')
+            target: Key, title or URL the operation acts on
+            status: Outcome of the operation
+            duration: Duration in seconds
+            **fields: Additional fields such as created IDs
+        """
+        if not self.listeners:
+            return
+        event = {
+            'ts': time.time(),
+            'kind': kind,
+            'phase': self.phase_name,
+            'operation': operation,
+            'target': target,
+            'status': status,
+            'duration': round(duration, 6) if duration is not None else None
+        }
+        event.update(fields)
+        with self._lock:
+            for listener in self.listeners:
+                listener.handle(event)
+    
+    @contextmanager
+    def phase(self, name: str, total: int = None) -> Iterator[None]:
+        """
+        Group the events emitted inside the block into a phase.
+        
+        Args:
+            name: Phase name (e.g. 'spaces')
+            total: Expected number of operations, used for the ETA
+        """
+        self.phase_name = name
+        self.emit('phase', 'start', name, total=total)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.emit('phase', 'end', name, duration=time.perf_counter() - start)
+            self.phase_name = None
+    
+    @contextmanager
+    def operation(self, operation: str, target: str = None, **fields) -> Iterator[Operation]:
+        """
+        Time the block and emit one 'op' event for it.
+        
+        Exceptions escaping the block are recorded with status 'error'
+        and re-raised.
+        
+        Args:
+            operation: Operation name
+            target: Key or title the operation acts on
+            **fields: Additional fields for the event
+        """
+        op = Operation()
+        op.fields.update(fields)
+        start = time.perf_counter()
+        try:
+            yield op
+        except Exception as e:
+            op.fail(e)
+            raise
+        finally:
+            self.emit('op', operation, target, op.status,
+                      time.perf_counter() - start, **op.fields)
+    
+    def close(self) -> None:
+        """Flush and close all listeners."""
+        with self._lock:
+            for listener in self.listeners:
+                listener.close()
+
+
+class JsonlSink:
+    """Writes events as JSON lines through a large write buffer."""
+    
+    def __init__(self, path: str, buffer_size: int = 1 << 16):
+        """
+        Initialize the sink.
+        
+        Args:
+            path: File to write events to
+            buffer_size: Size of the write buffer in bytes
+        """
+        self.path = path
+        self._file = open(path, 'wb', buffering=buffer_size)
+    
+    def handle(self, event: Dict[str, Any]) -> None:
+        """Append an event to the file."""
+        self._file.write(jsonutil.dumps(event) + b'\n')
+    
+    def close(self) -> None:
+        """Flush and close the file."""
+        if not self._file.closed:
+            self._file.close()
+
+
+class ProgressDisplay:
+    """Single-line live display of ops/s, error rate and ETA for the current phase."""
+    
+    def __init__(self, stream: TextIO = None, interval: float = 0.25):
+        """
+        Initialize the display.
+        
+        Args:
+            stream: Output stream (defaults to stderr)
+            interval: Minimum number of seconds between redraws
+        """
+        self.stream = stream or sys.stderr
+        self.interval = interval
+        self._reset(None, None)
+    
+    def _reset(self, phase: Optional[str], total: Optional[int]) -> None:
+        self.phase = phase
+        self.total = total
+        self.done = 0
+        self.errors = 0
+        self.started = time.perf_counter()
+        self._last_draw = 0.0
+    
+    def handle(self, event: Dict[str, Any]) -> None:
+        """Update counters and redraw when due."""
+        kind = event['kind']
+        if kind == 'phase':
+            if event['operation'] == 'start':
+                self._reset(event['target'], event.get('total'))
+            else:
+                self._draw()
+                self.stream.write('\n')
+                self.stream.flush()
+        elif kind == 'op':
+            self.done += 1
+            if event['status'] == 'error':
+                self.errors += 1
+            if time.perf_counter() - self._last_draw >= self.interval:
+                self._draw()
+    
+    def _draw(self) -> None:
+        now = time.perf_counter()
+        self._last_draw = now
+        elapsed = max(now - self.started, 1e-9)
+        rate = self.done / elapsed
+        error_rate = self.errors / self.done if self.done else 0.0
+        count = f"{self.done}/{self.total}" if self.total else str(self.done)
+        line = f"[{self.phase}] {count} ops  {rate:.1f} ops/s  errors {error_rate:.1%}"
+        if self.total and rate > 0:
+            line += f"  ETA {max(self.total - self.done, 0) / rate:.0f}s"
+        self.stream.write('\r' + line.ljust(72))
+        self.stream.flush()
+    
+    def close(self) -> None:
+        """Nothing to release."""
+
+
+class ConsoleRenderer:
+    """Renders events as the human-readable setup output."""
+    
+    PHASE_TITLES = {
+        'users': "🔧 Verifying users...",
+        'groups': "🔧 Setting up groups...",
+        'spaces': "🔧 Setting up spaces...",
+        'content': "🔧 Setting up content...",
+        'teardown': "🧹 Deleting spaces...",
+        'purge_trash': "🧹 Purging trash..."
+    }
+    
+    PHASE_NOTES = {
+        'users': "⚠️ Note: Users cannot be verified via API - they are assumed to exist",
+        'spaces': "⚠️ Note: Set space permissions manually in the Confluence admin console",
+        'content': "⚠️ Note: Set content permissions manually in Confluence"
+    }
+    
+    OP_MESSAGES = {
+        ('verify_user', 'ok'): "  ✅ User {target} verified and ready",
+        ('verify_user', 'missing'): "  ❌ User {target} not found. Please create this user first.",
+        ('verify_user', 'error'): "  ❌ Failed to verify user {target}: {error}",
+        ('create_group', 'ok'): "  ✅ Group {target} created successfully",
+        ('create_group', 'exists'): "  ⚠️ Group {target} already exists - using existing group",
+        ('create_group', 'error'): "  ❌ Failed to set up group {target}: {error}",
+        ('add_user_to_group', 'ok'): "  ✅ User {target} added to group {group} successfully",
+        ('add_user_to_group', 'skipped'): "  ⚠️ No standard users available to add to group {group}.",
+        ('add_user_to_group', 'error'): "  ❌ Failed to add {target} to group {group}: {error}",
+        ('create_space', 'ok'): "  ✅ Space {target} created successfully",
+        ('create_space', 'exists'): "  ⚠️ Space {target} already exists - using existing space",
+        ('create_space', 'error'): "  ❌ Failed to create space {target}: {error}",
+        ('create_page', 'ok'): "  ✅ Page '{target}' created successfully",
+        ('create_page', 'exists'): "  ⚠️ Page '{target}' already exists - skipping",
+        ('create_page', 'error'): "  ❌ Failed to create page '{target}': {error}",
+        ('create_blog_post', 'ok'): "  ✅ Blog post '{target}' created successfully",
+        ('create_blog_post', 'exists'): "  ⚠️ Blog post '{target}' already exists - skipping",
+        ('create_blog_post', 'error'): "  ❌ Failed to create blog post '{target}': {error}",
+        ('delete_space', 'ok'): "  ✅ Space {target} deleted",
+        ('delete_space', 'missing'): "  ⚠️ Space {target} does not exist - skipping",
+        ('delete_space', 'error'): "  ❌ Failed to delete space {target}: {error}",
+        ('purge_trash', 'ok'): "  ✅ Purged {purged} items from {target}",
+        ('purge_trash', 'error'): "  ❌ Failed to purge trash in {target}: {error}"
+    }
+    
+    # How a status counts in a phase summary, by operation; statuses not
+    # listed here count as 'succeeded' (ok), 'failed' (error) or 'skipped'
+    OP_OUTCOMES = {
+        ('verify_user', 'missing'): 'failed'
+    }
+    
+    def __init__(self, stream: TextIO = None):
+        """
+        Initialize the renderer.
+        
+        Args:
+            stream: Output stream (defaults to stdout)
+        """
+        self.stream = stream or sys.stdout
+        self._counts = {}
+    
+    def _print(self, line: str = "") -> None:
+        self.stream.write(line + '\n')
+    
+    def handle(self, event: Dict[str, Any]) -> None:
+        """Print the human-readable form of an event."""
+        kind = event['kind']
+        if kind == 'op':
+            outcome = self._outcome(event['operation'], event['status'])
+            self._counts[outcome] = self._counts.get(outcome, 0) + 1
+            template = self.OP_MESSAGES.get((event['operation'], event['status']),
+                                            "  {status}: {operation} {target}")
+            self._print(template.format_map(_Defaults(event)))
+        elif kind == 'request' and event['status'] == 'error':
+            self._print(f"API request failed: {event.get('error')}")
+            if event.get('response'):
+                self._print(f"Response content: {event['response']}")
+        elif kind == 'phase':
+            self._render_phase(event)
+        elif kind == 'run':
+            self._render_run(event)
+    
+    def _outcome(self, operation: str, status: str) -> str:
+        """Classify an operation's status for the phase summary."""
+        outcome = self.OP_OUTCOMES.get((operation, status))
+        if outcome is not None:
+            return outcome
+        if status == 'ok':
+            return 'succeeded'
+        return 'failed' if status == 'error' else 'skipped'
+    
+    def _render_phase(self, event: Dict[str, Any]) -> None:
+        name = event['target']
+        if event['operation'] == 'start':
+            self._counts = {}
+            self._print(self.PHASE_TITLES.get(name, f"🔧 {name}..."))
+            return
+        if name in self.PHASE_NOTES:
+            self._print(f"  {self.PHASE_NOTES[name]}")
+        done = self._counts.get('succeeded', 0)
+        failed = self._counts.get('failed', 0)
+        skipped = self._counts.get('skipped', 0)
+        self._print(f"✅ {name.capitalize()} completed: {done} succeeded, {skipped} skipped, "
+                    f"{failed} failed ({event['duration']:.1f}s)")
+        self._print()
+    
+    def _render_run(self, event: Dict[str, Any]) -> None:
+        if event['operation'] == 'start':
+            self._print("🚀 Starting Confluence Cloud setup...")
+            self._print("=" * 50)
+        elif event['status'] == 'error':
+            self._print(f"❌ Setup failed: {event.get('error')}")
+        else:
+            self._print("🎉 Setup completed successfully!")
+            self._print("=" * 50)
+            self._print(f"✅ Created {len(event['users'])} users")
+            self._print(f"✅ Created 1 group: {event['group']}")
+            self._print(f"✅ Created {len(event['spaces'])} spaces")
+            self._print(f"✅ Created {len(event['content'])} content items")
+            self._print()
+            self._print("📋 Summary:")
+            self._print(f"  - Users: {event['users']}")
+            self._print(f"  - Group: {event['group']}")
+            self._print(f"  - Spaces: {event['spaces']}")
+            self._print(f"  - Content: {event['content']}")
+    
+    def close(self) -> None:
+        """Flush the output stream."""
+        self.stream.flush()
+
+
+class _Defaults(dict):
+    """Mapping for str.format_map that renders missing fields as empty."""
+    
+    def __missing__(self, key: str) -> str:
+        return ''
@@ -0,0 +1,47 @@
+"""
+JSON encoding and decoding helpers
+
+This module uses orjson when it is installed and falls back to the standard
+library json module otherwise, so the fast backend stays optional.
+"""
+
+import json
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Name of the active JSON backend
+BACKEND = 'orjson' if orjson is not None else 'json'
+
+
+def dumps(obj: Any) -> bytes:
+    """
+    Serialize an object to compact UTF-8 encoded JSON.
+    
+    Args:
+        obj: Object to serialize
+        
+    Returns:
+        JSON document as bytes
+    """
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """
+    Deserialize a JSON document.
+    
+    Args:
+        data: JSON document as bytes or str
+        
+    Returns:
+        Deserialized object
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
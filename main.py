@@ -5,23 +5,102 @@ This script implements the Senior Technical Specialist take-home exercise
 for setting up a Confluence Cloud site with users, groups, spaces, and content.
 """
 
+import argparse
 import os
 import time
-from typing import Dict, List, Any
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Any, Optional
 from confluence_client import ConfluenceClient
+from events import ConsoleRenderer, EventStream, JsonlSink, Operation, ProgressDisplay, error_text
+from profiling import Profiler, profile_session
+from models import ContentRecord, SpaceRecord
+from transport import RecordingTransport, ReplayTransport
+
+# Default output files of the profiling modes that write one
+PROFILE_OUTPUTS = {
+    'cprofile': 'setup.prof',
+    'sample': 'setup.folded'
+}
 
 
 class ConfluenceSetup:
     """Main class for setting up Confluence Cloud site."""
     
-    def __init__(self):
-        """Initialize the Confluence setup with API client."""
-        self.client = ConfluenceClient()
+    SPACE_CONFIGS = [
+        {
+            'key': 'ADMIN',
+            'name': 'Administrator Space',
+            'description': 'Space restricted to administrators only'
+        },
+        {
+            'key': 'RESTRICTED',
+            'name': 'Restricted Workspace',
+            'description': 'Highly restricted workspace for sensitive information'
+        },
+        {
+            'key': 'COLLAB',
+            'name': 'Collaborative Workspace',
+            'description': 'Open collaborative workspace for team projects'
+        },
+        {
+            'key': 'TEAM',
+            'name': 'Team Space',
+            'description': 'Space for team collaboration'
+        },
+        {
+            'key': 'PUBLIC',
+            'name': 'Public Space',
+            'description': 'Public space with read access for all users'
+        }
+    ]
+    
+    def __init__(self, client: ConfluenceClient = None, request_delay: float = 1.0,
+                 interactive: bool = True, keep_responses: bool = False,
+                 events: EventStream = None):
+        """
+        Initialize the Confluence setup with API client.
+        
+        Args:
+            client: API client to use (defaults to one configured from the environment)
+            request_delay: Seconds to wait between write requests (rate limiting)
+            interactive: Whether to pause for manual user creation
+            keep_responses: Keep full API responses instead of compact records
+            events: Event stream to report progress to (defaults to the client's)
+        """
+        self.client = client or ConfluenceClient(events=events)
+        self.events = events or self.client.events
+        self.request_delay = request_delay
+        self.interactive = interactive
+        self.keep_responses = keep_responses
         self.users = {}
         self.group_name = "standard-users"
         self.spaces = {}
         self.content = {}
     
+    def _rate_limit(self) -> None:
+        """Wait between write requests and report the time actually waited."""
+        start = time.perf_counter()
+        time.sleep(self.request_delay)
+        self.events.emit('wait', 'rate_limit', duration=time.perf_counter() - start)
+    
+    @property
+    def _space_expand(self) -> str:
+        """Expansions to request for spaces (None for the API default)."""
+        return None if self.keep_responses else SpaceRecord.EXPAND
+    
+    @property
+    def _content_expand(self) -> str:
+        """Expansions to request for created content (None for the API default)."""
+        return None if self.keep_responses else ContentRecord.EXPAND
+    
+    def _space_entry(self, space: Dict[str, Any]) -> Any:
+        """Return what to keep for a space response."""
+        return space if self.keep_responses else SpaceRecord.from_response(space)
+    
+    def _content_entry(self, content: Dict[str, Any]) -> Any:
+        """Return what to keep for a page or blog post response."""
+        return content if self.keep_responses else ContentRecord.from_response(content)
+    
     def setup_users(self) -> None:
         """
         Create users as specified in the requirements:
@@ -31,11 +110,6 @@ class ConfluenceSetup:
         Note: Users must be created manually through Atlassian admin console
         as Confluence Cloud doesn't support direct user creation via API.
         """
-        print("🔧 Setting up users...")
-        print("⚠️  IMPORTANT: Confluence Cloud requires manual user creation.")
-        print("   Users must be created through the Atlassian admin console.")
-        print()
-        
         # User configurations
         user_configs = [
             {
@@ -70,88 +144,85 @@ class ConfluenceSetup:
             }
         ]
         
-        print("📋 User Creation Instructions:")
-        print("=" * 50)
-        print("1. Go to your Atlassian admin console")
-        print("2. Navigate to 'User management' > 'Users'")
-        print("3. Click 'Invite users' or 'Add users'")
-        print("4. Create the following users:")
-        print()
-        
-        for i, config in enumerate(user_configs, 1):
-            print(f"User {i}: {config['display_name']}")
-            print(f"  - Username: {config['username']}")
-            print(f"  - Email: {config['email']}")
-            print(f"  - Admin privileges: {'Yes' if config['is_admin'] else 'No'}")
+        if self.interactive:
+            print("🔧 Setting up users...")
+            print("⚠️  IMPORTANT: Confluence Cloud requires manual user creation.")
+            print("   Users must be created through the Atlassian admin console.")
             print()
-        
-        print("⏳ Please create all users manually, then press Enter to continue...")
-        input("Press Enter when all users are created...")
+            print("📋 User Creation Instructions:")
+            print("=" * 50)
+            print("1. Go to your Atlassian admin console")
+            print("2. Navigate to 'User management' > 'Users'")
+            print("3. Click 'Invite users' or 'Add users'")
+            print("4. Create the following users:")
+            print()
+            
+            for i, config in enumerate(user_configs, 1):
+                print(f"User {i}: {config['display_name']}")
+                print(f"  - Username: {config['username']}")
+                print(f"  - Email: {config['email']}")
+                print(f"  - Admin privileges: {'Yes' if config['is_admin'] else 'No'}")
+                print()
+            
+            print("⏳ Please create all users manually, then press Enter to continue...")
+            input("Press Enter when all users are created...")
         
         # Verify users exist and add them to our tracking
-        for config in user_configs:
-            try:
-                print(f"  Verifying user: {config['username']}")
-                if self.client.check_user_exists(config['username']):
-                    user = {
-                        'id': f'user-{config["username"]}',
-                        'username': config['username'],
-                        'email': config['email'],
-                        'displayName': config['display_name'],
-                        'isAdmin': config['is_admin']
-                    }
-                    self.users[config['username']] = user
-                    print(f"  ✅ User {config['username']} verified and ready")
-                else:
-                    print(f"  ❌ User {config['username']} not found. Please create this user first.")
-                    # Continue with other users even if one fails
-                
-            except Exception as e:
-                print(f"  ❌ Failed to verify user {config['username']}: {e}")
-        
-        print(f"✅ User setup completed. {len(self.users)} users ready for setup.")
+        with self.events.phase('users', total=len(user_configs)):
+            for config in user_configs:
+                with self.events.operation('verify_user', config['username']) as op:
+                    try:
+                        if self.client.check_user_exists(config['username']):
+                            user = {
+                                'id': f'user-{config["username"]}',
+                                'username': config['username'],
+                                'email': config['email'],
+                                'displayName': config['display_name'],
+                                'isAdmin': config['is_admin']
+                            }
+                            self.users[config['username']] = user
+                            op.set(user_id=user['id'])
+                        else:
+                            # Continue with other users even if one fails
+                            op.fail(status='missing')
+                    except Exception as e:
+                        op.fail(e)
     
     def setup_groups(self) -> None:
         """
         Create group and add standard users to it.
         Administrator is not added to the group.
         """
-        print("🔧 Setting up groups...")
+        # Add standard users to the group (exclude admin)
+        standard_users = [username for username in self.users.keys() if username != 'PepikM']
         
-        try:
+        with self.events.phase('groups', total=len(standard_users) + 1):
             # Create the group
-            print(f"  Creating group: {self.group_name}")
-            try:
-                group = self.client.create_group(self.group_name)
-                print(f"  ✅ Group {self.group_name} created successfully")
-            except Exception as group_error:
-                if "already exists" in str(group_error) or "Group already exists" in str(group_error):
-                    print(f"  ⚠️ Group {self.group_name} already exists - using existing group")
-                else:
-                    raise group_error
-            
-            # Add standard users to the group (exclude admin)
-            standard_users = [username for username in self.users.keys() if username != 'PepikM']
+            with self.events.operation('create_group', self.group_name) as op:
+                try:
+                    self.client.create_group(self.group_name)
+                except Exception as group_error:
+                    if "already exists" in error_text(group_error):
+                        op.fail(status='exists')
+                    else:
+                        op.fail(group_error)
+            if op.status == 'error':
+                return
             
             if not standard_users:
-                print("  ⚠️ No standard users available to add to group.")
-                print("  Please ensure users are created and verified first.")
+                with self.events.operation('add_user_to_group', self.group_name,
+                                           group=self.group_name) as op:
+                    op.fail(status='skipped')
                 return
             
             for username in standard_users:
-                try:
-                    print(f"  Adding {username} to group {self.group_name}")
-                    self.client.add_user_to_group(self.group_name, username)
-                    print(f"  ✅ User {username} added to group successfully")
-                    time.sleep(1)  # Rate limiting
-                    
-                except Exception as e:
-                    print(f"  ❌ Failed to add {username} to group: {e}")
-            
-            print(f"✅ Group setup completed. Added {len(standard_users)} users to group.")
-            
-        except Exception as e:
-            print(f"❌ Failed to setup groups: {e}")
+                with self.events.operation('add_user_to_group', username, group=self.group_name) as op:
+                    try:
+                        self.client.add_user_to_group(self.group_name, username)
+                    except Exception as e:
+                        op.fail(e)
+                if op.status == 'ok':
+                    self._rate_limit()
     
     def setup_spaces(self) -> None:
         """
@@ -160,76 +231,51 @@ class ConfluenceSetup:
         - Team Space: Group members can view and edit
         - Public Space: All users can view, only administrators can edit
         """
-        print("🔧 Setting up spaces...")
-        
-        space_configs = [
-            {
-                'key': 'ADMIN',
-                'name': 'Administrator Space',
-                'description': 'Space restricted to administrators only'
-            },
-            {
-                'key': 'RESTRICTED',
-                'name': 'Restricted Workspace',
-                'description': 'Highly restricted workspace for sensitive information'
-            },
-            {
-                'key': 'COLLAB',
-                'name': 'Collaborative Workspace',
-                'description': 'Open collaborative workspace for team projects'
-            },
-            {
-                'key': 'TEAM',
-                'name': 'Team Space',
-                'description': 'Space for team collaboration'
-            },
-            {
-                'key': 'PUBLIC',
-                'name': 'Public Space',
-                'description': 'Public space with read access for all users'
-            }
-        ]
-        
-        for config in space_configs:
-            try:
-                print(f"  Creating space: {config['key']}")
-                space = self.client.create_space(
-                    space_key=config['key'],
-                    name=config['name'],
-                    description=config['description']
-                )
-                self.spaces[config['key']] = space
-                print(f"  ✅ Space {config['key']} created successfully")
-                
-                # Note: Space permissions must be set manually in Confluence admin console
-                print(f"  ⚠️ Note: Set space permissions manually for {config['key']} in Confluence admin console")
-                
-                time.sleep(1)  # Rate limiting
-                
-            except Exception as e:
-                if "already exists" in str(e) or "Space keys must be unique" in str(e):
-                    print(f"  ⚠️ Space {config['key']} already exists - using existing space")
-                    # Try to get existing space
+        # Note: Space permissions must be set manually in Confluence admin console
+        with self.events.phase('spaces', total=len(self.SPACE_CONFIGS)):
+            for config in self.SPACE_CONFIGS:
+                with self.events.operation('create_space', config['key']) as op:
                     try:
-                        space = self.client.get_space(config['key'])
-                        self.spaces[config['key']] = space
-                        print(f"  ✅ Using existing space {config['key']}")
-                        # Note: Space permissions must be set manually in Confluence admin console
-                        print(f"  ⚠️ Note: Set space permissions manually for {config['key']} in Confluence admin console")
-                    except:
-                        print(f"  ❌ Could not access existing space {config['key']}")
-                else:
-                    print(f"  ❌ Failed to create space {config['key']}: {e}")
+                        space = self.client.create_space(
+                            space_key=config['key'],
+                            name=config['name'],
+                            description=config['description'],
+                            expand=self._space_expand
+                        )
+                        self.spaces[config['key']] = self._space_entry(space)
+                        op.set(space_id=space.get('id'))
+                    except Exception as e:
+                        if any(text in error_text(e) for text in ("already exists", "Space keys must be unique")):
+                            op.fail(status='exists')
+                            self._use_existing_space(config['key'], op)
+                        else:
+                            op.fail(e)
+                
+                if op.status == 'ok':
+                    self._rate_limit()
+    
+    def _use_existing_space(self, space_key: str, op: Operation) -> None:
+        """
+        Look up a space that already exists and track it.
+        
+        The lookup is reported as part of the create_space operation.
         
-        print(f"✅ Space setup completed. Created {len(self.spaces)} spaces.")
+        Args:
+            space_key: Key of the existing space
+            op: The create_space operation
+        """
+        try:
+            space = self.client.get_space(space_key, expand=self._space_expand)
+            self.spaces[space_key] = self._space_entry(space)
+            op.set(space_id=space.get('id'))
+        except Exception as e:
+            op.fail(f"Space already exists but could not be accessed: {e}")
     
     
     def setup_content(self) -> None:
         """
         Create pages and blog posts with proper permissions.
         """
-        print("🔧 Setting up content...")
-        
         # Create pages in different spaces
         page_configs = [
             {
@@ -324,29 +370,6 @@ class ConfluenceSetup:
             }
         ]
         
-        # Create pages
-        for config in page_configs:
-            try:
-                print(f"  Creating page: {config['title']} in space {config['space_key']}")
-                page = self.client.create_page(
-                    space_key=config['space_key'],
-                    title=config['title'],
-                    content=config['content']
-                )
-                self.content[config['title']] = page
-                print(f"  ✅ Page '{config['title']}' created successfully")
-                
-                # Note: Content permissions must be set manually in Confluence
-                print(f"  ⚠️ Note: Set content permissions manually for '{config['title']}' in Confluence")
-                
-                time.sleep(1)  # Rate limiting
-                
-            except Exception as e:
-                if "already exists" in str(e) or "same TITLE" in str(e):
-                    print(f"  ⚠️ Page '{config['title']}' already exists - skipping")
-                else:
-                    print(f"  ❌ Failed to create page '{config['title']}': {e}")
-        
         # Create blog posts
         blog_configs = [
             {
@@ -427,78 +450,215 @@ class ConfluenceSetup:
             }
         ]
         
-        # Create blog posts
-        for config in blog_configs:
-            try:
-                print(f"  Creating blog post: {config['title']} in space {config['space_key']}")
-                blog_post = self.client.create_blog_post(
-                    space_key=config['space_key'],
-                    title=config['title'],
-                    content=config['content']
-                )
-                self.content[config['title']] = blog_post
-                print(f"  ✅ Blog post '{config['title']}' created successfully")
-                
-                # Note: Content permissions must be set manually in Confluence
-                print(f"  ⚠️ Note: Set content permissions manually for '{config['title']}' in Confluence")
-                
-                time.sleep(1)  # Rate limiting
-                
-            except Exception as e:
-                if "already exists" in str(e) or "same TITLE" in str(e):
-                    print(f"  ⚠️ Blog post '{config['title']}' already exists - skipping")
-                else:
-                    print(f"  ❌ Failed to create blog post '{config['title']}': {e}")
+        # Note: Content permissions must be set manually in Confluence
+        content_steps = [
+            ('create_page', self.client.create_page, page_configs),
+            ('create_blog_post', self.client.create_blog_post, blog_configs)
+        ]
+        with self.events.phase('content', total=len(page_configs) + len(blog_configs)):
+            for operation, create, configs in content_steps:
+                for config in configs:
+                    with self.events.operation(operation, config['title'],
+                                               space_key=config['space_key']) as op:
+                        try:
+                            content = create(
+                                space_key=config['space_key'],
+                                title=config['title'],
+                                content=config['content'],
+                                expand=self._content_expand
+                            )
+                            self.content[config['title']] = self._content_entry(content)
+                            op.set(content_id=content.get('id'))
+                        except Exception as e:
+                            if any(text in error_text(e) for text in ("already exists", "same TITLE")):
+                                op.fail(status='exists')
+                            else:
+                                op.fail(e)
+                    if op.status == 'ok':
+                        self._rate_limit()
+    
+    def teardown(self, space_keys: List[str] = None, profile: str = None,
+                 profile_output: str = None) -> None:
+        """
+        Delete the spaces created by the setup, including all their content.
+        
+        Deletions are started concurrently and their long-running tasks are
+        polled until they finish.
         
-        print(f"✅ Content setup completed. Created {len(self.content)} content items.")
+        Args:
+            space_keys: Keys of the spaces to delete (defaults to all configured spaces)
+            profile: Profiling mode, as for run_setup
+            profile_output: Output file for 'cprofile' or 'sample'
+        """
+        space_keys = space_keys or [config['key'] for config in self.SPACE_CONFIGS]
+        
+        with self._profiling(profile, profile_output), \
+                self.events.phase('teardown', total=len(space_keys)):
+            self.client.delete_spaces(space_keys, on_result=self._report_deletion)
+    
+    def _report_deletion(self, space_key: str, result: Dict[str, Any]) -> None:
+        """Emit the event for one finished space deletion."""
+        if result['status'] == 'deleted':
+            self.spaces.pop(space_key, None)
+            self.events.emit('op', 'delete_space', space_key, 'ok', result['duration'],
+                             task_id=result['task'].get('id'))
+        elif result['status'] == 'missing':
+            self.events.emit('op', 'delete_space', space_key, 'missing', result['duration'])
+        else:
+            self.events.emit('op', 'delete_space', space_key, 'error', result['duration'],
+                             error=result['error'])
     
+    def purge_trash(self, space_keys: List[str] = None, profile: str = None,
+                    profile_output: str = None) -> None:
+        """
+        Permanently remove trashed pages and blog posts without deleting the spaces.
+        
+        Args:
+            space_keys: Keys of the spaces to purge (defaults to all configured spaces)
+            profile: Profiling mode, as for run_setup
+            profile_output: Output file for 'cprofile' or 'sample'
+        """
+        space_keys = space_keys or [config['key'] for config in self.SPACE_CONFIGS]
+        
+        with self._profiling(profile, profile_output), \
+                self.events.phase('purge_trash', total=len(space_keys)):
+            for space_key in space_keys:
+                with self.events.operation('purge_trash', space_key) as op:
+                    try:
+                        result = self.client.purge_trash(space_key)
+                        op.set(purged=result['purged'], failed=len(result['failed']))
+                        if result['failed']:
+                            op.fail(f"{len(result['failed'])} items could not be purged")
+                    except Exception as e:
+                        op.fail(e)
     
-    def run_setup(self) -> None:
-        """Run the complete Confluence setup process."""
-        print("🚀 Starting Confluence Cloud setup...")
-        print("=" * 50)
+    def run_setup(self, profile: str = None, profile_output: str = None) -> None:
+        """
+        Run the complete Confluence setup process.
+        
+        Args:
+            profile: Profiling mode: 'timing' reports wall time per phase,
+                operation and request part; 'cprofile' and 'sample' also
+                run the setup under cProfile or a stack sampler
+            profile_output: Output file for 'cprofile' (pstats) or
+                'sample' (collapsed stacks for flame graphs)
+        """
+        with self._profiling(profile, profile_output):
+            self._run_steps()
+    
+    @contextmanager
+    def _profiling(self, profile: Optional[str], profile_output: Optional[str]) -> Iterator[None]:
+        """
+        Profile the block in the given mode and print the timing report.
+        
+        Args:
+            profile: Profiling mode ('timing', 'cprofile', 'sample') or None
+            profile_output: Output file for 'cprofile' or 'sample'
+        """
+        if not profile:
+            yield
+            return
+        
+        profiler = Profiler()
+        self.events.listeners.append(profiler)
+        self.client.enable_profiling()
+        session_mode = profile if profile in ('cprofile', 'sample') else None
+        try:
+            with profile_session(session_mode, profile_output or PROFILE_OUTPUTS.get(profile)):
+                yield
+        finally:
+            self.events.listeners.remove(profiler)
+        print(profiler.format_report())
+    
+    def _run_steps(self) -> None:
+        """Run the setup steps in order and report the run."""
+        self.events.emit('run', 'start', 'setup')
+        start = time.perf_counter()
         
         try:
             # Execute setup steps in order
             self.setup_users()
-            print()
-            
             self.setup_groups()
-            print()
-            
             self.setup_spaces()
-            print()
-            
             self.setup_content()
-            print()
-            
-            # Summary
-            print("🎉 Setup completed successfully!")
-            print("=" * 50)
-            print(f"✅ Created {len(self.users)} users")
-            print(f"✅ Created 1 group: {self.group_name}")
-            print(f"✅ Created {len(self.spaces)} spaces")
-            print(f"✅ Created {len(self.content)} content items")
-            print()
-            print("📋 Summary:")
-            print(f"  - Users: {list(self.users.keys())}")
-            print(f"  - Group: {self.group_name}")
-            print(f"  - Spaces: {list(self.spaces.keys())}")
-            print(f"  - Content: {list(self.content.keys())}")
-            
         except Exception as e:
-            print(f"❌ Setup failed: {e}")
+            self.events.emit('run', 'end', 'setup', 'error', time.perf_counter() - start,
+                             error=str(e))
             raise
+        
+        self.events.emit('run', 'end', 'setup', 'ok', time.perf_counter() - start,
+                         users=list(self.users.keys()),
+                         group=self.group_name,
+                         spaces=list(self.spaces.keys()),
+                         content=list(self.content.keys()))
 
 
 def main():
     """Main function to run the Confluence setup."""
+    parser = argparse.ArgumentParser(description="Set up or tear down a Confluence Cloud site.")
+    parser.add_argument('--teardown', action='store_true',
+                        help="Delete the configured spaces instead of running the setup")
+    parser.add_argument('--purge-trash', action='store_true',
+                        help="Purge trashed content in the configured spaces instead of running the setup")
+    parser.add_argument('--record', metavar='PATH',
+                        help="Record all API requests and responses to a JSONL file (.gz to compress)")
+    parser.add_argument('--replay', metavar='PATH',
+                        help="Replay a recording offline instead of calling the live site")
+    parser.add_argument('--replay-speed', choices=['realtime', 'max'], default='max',
+                        help="Reproduce recorded latencies or replay as fast as possible")
+    parser.add_argument('--keep-responses', action='store_true',
+                        help="Keep full API responses in memory instead of compact records")
+    parser.add_argument('--events', metavar='PATH',
+                        help="Write a structured JSONL event stream to a file")
+    parser.add_argument('--progress', action='store_true',
+                        help="Show live ops/s, error rate and ETA per phase")
+    parser.add_argument('--quiet', action='store_true',
+                        help="Do not print human-readable output for each operation")
+    parser.add_argument('--profile', choices=['timing', 'cprofile', 'sample'],
+                        help="Report where the run spends its time; 'cprofile' and 'sample' "
+                             "also write a profile file")
+    parser.add_argument('--profile-output', metavar='PATH',
+                        help="Profile file for --profile cprofile/sample "
+                             "(default setup.prof / setup.folded)")
+    args = parser.parse_args()
+    
+    listeners = []
+    if not args.quiet:
+        listeners.append(ConsoleRenderer())
+    if args.progress:
+        listeners.append(ProgressDisplay())
+    if args.events:
+        listeners.append(JsonlSink(args.events))
+    events = EventStream(listeners)
+    
+    transport = None
+    setup_options = {'keep_responses': args.keep_responses, 'events': events}
+    if args.replay:
+        transport = ReplayTransport(args.replay, realtime=args.replay_speed == 'realtime')
+        setup_options['interactive'] = False
+        if args.replay_speed == 'max':
+            setup_options['request_delay'] = 0
+    elif args.record:
+        transport = lambda session: RecordingTransport(session, args.record)
+    
+    client = None
     try:
-        setup = ConfluenceSetup()
-        setup.run_setup()
+        client = ConfluenceClient(transport=transport, events=events)
+        setup = ConfluenceSetup(client, **setup_options)
+        profile_options = {'profile': args.profile, 'profile_output': args.profile_output}
+        if args.teardown:
+            setup.teardown(**profile_options)
+        elif args.purge_trash:
+            setup.purge_trash(**profile_options)
+        else:
+            setup.run_setup(**profile_options)
     except Exception as e:
         print(f"❌ Application failed: {e}")
         return 1
+    finally:
+        if client is not None:
+            client.transport.close()
+        events.close()
     
     return 0
 
@@ -0,0 +1,110 @@
+"""
+Compact records for Confluence resources
+
+API responses are large nested dictionaries. These records keep only the
+fields the setup needs and use __slots__ so that holding many of them is cheap.
+"""
+
+from typing import Any, Dict, Optional
+
+
+def _links(data: Dict[str, Any]) -> Dict[str, str]:
+    """Keep only the string-valued entries of a response's _links."""
+    return {name: value for name, value in data.get('_links', {}).items()
+            if isinstance(value, str)}
+
+
+class SpaceRecord:
+    """Minimal representation of a Confluence space."""
+    
+    __slots__ = ('id', 'key', 'name', 'links')
+    
+    # Expansions to request when only a record is needed (id, key, name
+    # and _links are always returned, so none are requested)
+    EXPAND = ''
+    
+    def __init__(self, id: Optional[str], key: str, name: str, links: Dict[str, str] = None):
+        """
+        Initialize the record.
+        
+        Args:
+            id: Space ID
+            key: Space key
+            name: Display name of the space
+            links: Links to the space (webui, self, ...)
+        """
+        self.id = id
+        self.key = key
+        self.name = name
+        self.links = links or {}
+    
+    @classmethod
+    def from_response(cls, data: Dict[str, Any]) -> 'SpaceRecord':
+        """
+        Build a record from a space API response.
+        
+        Args:
+            data: Space information returned by the API
+            
+        Returns:
+            Space record
+        """
+        space_id = data.get('id')
+        return cls(
+            id=str(space_id) if space_id is not None else None,
+            key=data.get('key'),
+            name=data.get('name'),
+            links=_links(data)
+        )
+    
+    def __repr__(self) -> str:
+        return f"SpaceRecord(key={self.key!r}, name={self.name!r})"
+
+
+class ContentRecord:
+    """Minimal representation of a Confluence page or blog post."""
+    
+    __slots__ = ('id', 'type', 'title', 'version', 'links')
+    
+    # Expansions to request when only a record is needed
+    EXPAND = 'version'
+    
+    def __init__(self, id: str, type: str, title: str, version: Optional[int] = None,
+                 links: Dict[str, str] = None):
+        """
+        Initialize the record.
+        
+        Args:
+            id: Content ID
+            type: Content type ('page' or 'blogpost')
+            title: Content title
+            version: Version number
+            links: Links to the content (webui, tinyui, self, ...)
+        """
+        self.id = id
+        self.type = type
+        self.title = title
+        self.version = version
+        self.links = links or {}
+    
+    @classmethod
+    def from_response(cls, data: Dict[str, Any]) -> 'ContentRecord':
+        """
+        Build a record from a content API response.
+        
+        Args:
+            data: Content information returned by the API
+            
+        Returns:
+            Content record
+        """
+        return cls(
+            id=data.get('id'),
+            type=data.get('type'),
+            title=data.get('title'),
+            version=data.get('version', {}).get('number'),
+            links=_links(data)
+        )
+    
+    def __repr__(self) -> str:
+        return f"ContentRecord(id={self.id!r}, type={self.type!r}, title={self.title!r})"
@@ -0,0 +1,286 @@
+"""
+Profiling support for Confluence setup runs
+
+This module attributes the wall time of a run to phases, operations and the
+parts of each API call (queue wait, rate-limit wait, encode, connect, server,
+transfer, parse). It can also wrap a run in a cProfile or sampling profiler
+session; the sampler writes collapsed stacks that flamegraph.pl, speedscope
+and similar tools read directly.
+"""
+
+import cProfile
+import pstats
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+# Parts an API call's time is split into, in the order they happen
+REQUEST_PARTS = ('encode', 'connect', 'server', 'transfer', 'parse')
+
+_connect_state = threading.local()
+
+# Profiles of worker threads started during a cProfile session
+_worker_profiles: Optional[List[cProfile.Profile]] = None
+_worker_profiles_lock = threading.Lock()
+
+
+def reset_connect_time() -> None:
+    """Reset the connect time accumulated by the current thread."""
+    _connect_state.seconds = 0.0
+
+
+def connect_time() -> float:
+    """Return the connect time accumulated by the current thread since the last reset."""
+    return getattr(_connect_state, 'seconds', 0.0)
+
+
+def _timed_connect(connect):
+    """Wrap a connection's connect() to accumulate its duration per thread."""
+    def timed(self):
+        start = time.perf_counter()
+        try:
+            return connect(self)
+        finally:
+            _connect_state.seconds = connect_time() + time.perf_counter() - start
+    return timed
+
+
+class _TimedHTTPConnection(HTTPConnection):
+    connect = _timed_connect(HTTPConnection.connect)
+
+
+class _TimedHTTPSConnection(HTTPSConnection):
+    connect = _timed_connect(HTTPSConnection.connect)
+
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+class TimedHTTPAdapter(HTTPAdapter):
+    """Adapter whose connections record TCP and TLS setup time (see connect_time)."""
+    
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': _TimedHTTPConnectionPool,
+            'https': _TimedHTTPSConnectionPool
+        }
+
+
+class _Stat:
+    """Count, total and maximum of a series of durations."""
+    
+    __slots__ = ('count', 'total', 'max')
+    
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+    
+    def add(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+
+class Profiler:
+    """Event listener that aggregates timings per phase, operation and request part."""
+    
+    def __init__(self):
+        """Initialize an empty profile."""
+        self.phases: Dict[str, float] = {}
+        self.operations: Dict[str, _Stat] = defaultdict(_Stat)
+        self.requests: Dict[str, _Stat] = defaultdict(_Stat)
+        self.request_parts: Dict[str, Dict[str, float]] = defaultdict(lambda: dict.fromkeys(REQUEST_PARTS, 0.0))
+        self.waits: Dict[str, _Stat] = defaultdict(_Stat)
+        self.run_time: Optional[float] = None
+    
+    def handle(self, event: Dict[str, Any]) -> None:
+        """Add an event's timings to the profile."""
+        kind = event['kind']
+        duration = event['duration']
+        if duration is None:
+            return
+        if kind == 'op':
+            self.operations[event['operation']].add(duration)
+        elif kind == 'request':
+            key = f"{event['phase'] or '-'} {event['operation']}"
+            self.requests[key].add(duration)
+            for part, seconds in (event.get('timings') or {}).items():
+                self.request_parts[key][part] += seconds
+        elif kind == 'wait':
+            self.waits[event['operation']].add(duration)
+        elif kind == 'phase' and event['operation'] == 'end':
+            self.phases[event['target']] = duration
+        elif kind == 'run' and event['operation'] == 'end':
+            self.run_time = duration
+    
+    def format_report(self) -> str:
+        """
+        Format the profile as a text report.
+        
+        Returns:
+            Report with wall time per phase, per operation, per request
+            group (split into its parts) and per kind of wait
+        """
+        lines = ["⏱️ Profile", "=" * 50]
+        if self.run_time is not None:
+            lines.append(f"Total run time: {self.run_time:.3f}s")
+        
+        lines.append("Phases:")
+        for name, seconds in self.phases.items():
+            share = f" ({seconds / self.run_time:.0%})" if self.run_time else ""
+            lines.append(f"  {name:<24} {seconds:9.3f}s{share}")
+        
+        lines.append("Operations:")
+        for name, stat in sorted(self.operations.items(), key=lambda item: -item[1].total):
+            lines.append(f"  {name:<24} {stat.count:5d} calls {stat.total:9.3f}s "
+                         f"(mean {stat.total / stat.count * 1000:.1f}ms, max {stat.max * 1000:.1f}ms)")
+        
+        lines.append("Requests (phase method):")
+        for key, stat in sorted(self.requests.items(), key=lambda item: -item[1].total):
+            lines.append(f"  {key:<24} {stat.count:5d} calls {stat.total:9.3f}s")
+            parts = self.request_parts.get(key)
+            if parts:
+                lines.append("    " + "  ".join(f"{part} {parts[part]:.3f}s" for part in REQUEST_PARTS))
+        
+        lines.append("Waits:")
+        for name, stat in sorted(self.waits.items(), key=lambda item: -item[1].total):
+            lines.append(f"  {name:<24} {stat.count:5d} waits {stat.total:9.3f}s")
+        return "\n".join(lines)
+    
+    def close(self) -> None:
+        """Nothing to release."""
+
+
+class StackSampler:
+    """Samples the stacks of all threads and writes them in collapsed format."""
+    
+    def __init__(self, interval: float = 0.005):
+        """
+        Initialize the sampler.
+        
+        Args:
+            interval: Seconds between samples
+        """
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+    
+    def start(self) -> None:
+        """Start sampling in a background thread."""
+        self._thread.start()
+    
+    def stop(self) -> None:
+        """Stop sampling and wait for the sampler thread."""
+        self._stop.set()
+        self._thread.join()
+    
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self.interval):
+            for thread in threading.enumerate():
+                names[thread.ident] = thread.name
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack: List[str] = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+                self.samples[';'.join(reversed(stack))] += 1
+    
+    def write(self, path: str) -> None:
+        """
+        Write the samples as collapsed stacks ("frame;frame;frame count").
+        
+        Args:
+            path: Output file
+        """
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+@contextmanager
+def profile_worker() -> Iterator[None]:
+    """
+    Profile the block in the current worker thread during a cProfile session.
+    
+    cProfile only sees the thread that enabled it, so each worker gets its own
+    profile, merged into the session's output when the session ends. Outside a
+    cProfile session this does nothing.
+    """
+    profiles = _worker_profiles
+    if profiles is None:
+        yield
+        return
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        # Python 3.12+ allows one active profiler, which already sees all threads
+        yield
+        return
+    try:
+        yield
+    finally:
+        profiler.disable()
+        with _worker_profiles_lock:
+            profiles.append(profiler)
+
+
+@contextmanager
+def profile_session(mode: Optional[str], path: str) -> Iterator[None]:
+    """
+    Run the block under a profiler and write its output file.
+    
+    Args:
+        mode: 'cprofile' (pstats file, including worker threads that use
+            profile_worker), 'sample' (collapsed stacks for flame graphs) or
+            None to run without a profiler
+        path: Output file
+    """
+    global _worker_profiles
+    if mode is None:
+        yield
+    elif mode == 'cprofile':
+        _worker_profiles = []
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            stats = pstats.Stats(profiler)
+            with _worker_profiles_lock:
+                for worker_profile in _worker_profiles:
+                    stats.add(worker_profile)
+                _worker_profiles = None
+            stats.dump_stats(path)
+    elif mode == 'sample':
+        sampler = StackSampler()
+        sampler.start()
+        try:
+            yield
+        finally:
+            sampler.stop()
+            sampler.write(path)
+    else:
+        raise ValueError(f"Unknown profiling mode: {mode}")
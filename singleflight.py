@@ -0,0 +1,89 @@
+"""
+Request coalescing for concurrent identical calls
+
+This module provides a single-flight group: while a call for a key is in
+flight, other threads asking for the same key wait for it and share its
+result instead of issuing their own call. Nothing is cached once the call
+has finished.
+"""
+
+import copy
+import threading
+from typing import Any, Callable, Dict, Hashable
+
+
+class _Call:
+    """State of one in-flight call."""
+    
+    __slots__ = ('done', 'result', 'error')
+    
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+def _copy_error(error: BaseException) -> BaseException:
+    """
+    Return a copy of a shared exception for one waiter to raise.
+    
+    Raising the same object from several threads would interleave their
+    tracebacks, so each waiter raises its own copy of the same type.
+    """
+    try:
+        error = copy.copy(error)
+    except Exception:
+        return error
+    error.__traceback__ = None
+    return error
+
+
+class SingleFlight:
+    """Merges concurrent calls with the same key into a single call."""
+    
+    def __init__(self):
+        """Initialize an empty single-flight group."""
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self.coalesced = 0
+    
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """
+        Run ``fn`` unless a call for ``key`` is already in flight.
+        
+        Callers that join an in-flight call receive the same result object
+        as the caller that made it, so results must be treated as
+        read-only. If the call fails, each of them raises a copy of its
+        exception.
+        
+        Args:
+            key: Identity of the call
+            fn: Function performing the call
+            
+        Returns:
+            Result of the call
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self.coalesced += 1
+        
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise _copy_error(call.error)
+            return call.result
+        
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
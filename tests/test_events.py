@@ -0,0 +1,45 @@
+"""Tests for the event stream's console rendering."""
+
+import io
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from events import ConsoleRenderer, EventStream
+
+
+def _render(phase, ops):
+    stream = io.StringIO()
+    events = EventStream([ConsoleRenderer(stream)])
+    with events.phase(phase, total=len(ops)):
+        for operation, target, status in ops:
+            with events.operation(operation, target) as op:
+                if status != 'ok':
+                    op.fail(status=status)
+    return stream.getvalue()
+
+
+def test_missing_space_on_teardown_counts_as_skipped():
+    output = _render('teardown', [('delete_space', 'TEAM', 'ok'),
+                                  ('delete_space', 'PUBLIC', 'missing')])
+    
+    assert "Space PUBLIC does not exist - skipping" in output
+    assert "1 succeeded, 1 skipped, 0 failed" in output
+
+
+def test_missing_user_counts_as_failed():
+    output = _render('users', [('verify_user', 'user1', 'ok'),
+                               ('verify_user', 'user2', 'missing')])
+    
+    assert "1 succeeded, 0 skipped, 1 failed" in output
+
+
+def test_request_errors_show_truncated_response():
+    stream = io.StringIO()
+    events = EventStream([ConsoleRenderer(stream)])
+    
+    events.emit('request', 'POST', 'https://example/group', 'error',
+                error="400 Client Error", response='{"message": "Group already exists"}')
+    
+    assert 'Response content: {"message": "Group already exists"}' in stream.getvalue()
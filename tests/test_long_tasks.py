@@ -0,0 +1,103 @@
+"""Tests for space deletion and long-running task polling."""
+
+import json
+import sys
+from collections import defaultdict, deque
+from pathlib import Path
+from urllib.parse import urlsplit
+
+import pytest
+import requests
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from confluence_client import ConfluenceClient
+from events import EventStream
+from transport import RecordedResponse
+
+
+class StubTransport:
+    """Offline transport answering (method, path) with queued responses; the last one repeats."""
+    
+    offline = True
+    
+    def __init__(self, routes):
+        self.routes = defaultdict(deque)
+        for key, responses in routes.items():
+            self.routes[key].extend(responses)
+        self.sleeps = []
+    
+    def request(self, method, url, **kwargs):
+        path = urlsplit(url).path.replace('/wiki/rest/api', '')
+        queue = self.routes[(method, path)]
+        if not queue:
+            raise requests.exceptions.ConnectionError(f"No stub for {method} {path}")
+        status, body = queue[0] if len(queue) == 1 else queue.popleft()
+        entry = {'status': status, 'reason': 'Stub', 'content': json.dumps(body)}
+        return RecordedResponse(entry, url)
+    
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+    
+    def close(self):
+        pass
+
+
+def _client(routes):
+    return ConfluenceClient(transport=StubTransport(routes), events=EventStream())
+
+
+def test_wait_for_long_task_backs_off_until_finished():
+    client = _client({('GET', '/longtask/t1'): [
+        (200, {'percentageComplete': 10}),
+        (200, {'percentageComplete': 50}),
+        (200, {'percentageComplete': 90}),
+        (200, {'finished': True, 'successful': True, 'percentageComplete': 100}),
+    ]})
+    
+    task = client.wait_for_long_task('t1', initial_delay=0.5, max_delay=1.5)
+    
+    assert task['successful'] is True
+    assert client.transport.sleeps == [0.5, 1.0, 1.5, 1.5]
+
+
+def test_wait_for_long_task_raises_on_unsuccessful_task():
+    client = _client({('GET', '/longtask/t1'): [
+        (200, {'finished': True, 'successful': False,
+               'messages': [{'translation': 'Space is locked'}]}),
+    ]})
+    
+    with pytest.raises(RuntimeError, match='Space is locked'):
+        client.wait_for_long_task('t1')
+
+
+def test_wait_for_long_task_times_out():
+    client = _client({('GET', '/longtask/t1'): [(200, {'percentageComplete': 10})]})
+    
+    with pytest.raises(TimeoutError):
+        client.wait_for_long_task('t1', timeout=0)
+
+
+def test_delete_spaces_classifies_results():
+    client = _client({
+        ('DELETE', '/space/OK'): [(202, {'id': 't-ok'})],
+        ('GET', '/longtask/t-ok'): [(200, {'finished': True, 'successful': True})],
+        ('DELETE', '/space/GONE'): [(404, {'message': 'No space with key GONE'})],
+        ('DELETE', '/space/LOST'): [(202, {'id': 't-lost'})],
+        ('GET', '/longtask/t-lost'): [(404, {'message': 'No task'})],
+        ('DELETE', '/space/DENIED'): [(403, {'message': 'Not permitted'})],
+    })
+    reported = {}
+    
+    results = client.delete_spaces(['OK', 'GONE', 'LOST', 'DENIED'],
+                                   on_result=lambda key, result: reported.update({key: result}))
+    
+    assert {key: result['status'] for key, result in results.items()} == {
+        'OK': 'deleted',
+        'GONE': 'missing',
+        'LOST': 'failed',
+        'DENIED': 'failed'
+    }
+    assert results['OK']['task']['successful'] is True
+    assert reported.keys() == results.keys()
+    assert all(result['duration'] >= 0 for result in results.values())
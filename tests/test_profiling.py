@@ -0,0 +1,31 @@
+"""Tests for profiler sessions."""
+
+import pstats
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from confluence_client import ConfluenceClient
+from events import EventStream
+from profiling import profile_session
+from transport import ReplayTransport
+
+
+def _work_in_worker(item):
+    return sum(range(1000)) + item
+
+
+def test_cprofile_session_includes_worker_threads(tmp_path):
+    recording = tmp_path / 'empty.jsonl'
+    recording.write_text('')
+    client = ConfluenceClient('https://example.atlassian.net', 'user', 'token',
+                              transport=ReplayTransport(str(recording)), events=EventStream())
+    output = tmp_path / 'run.prof'
+    
+    with profile_session('cprofile', str(output)):
+        results = client._run_concurrently(_work_in_worker, [1, 2, 3], max_workers=3)
+    
+    assert results == [499501, 499502, 499503]
+    functions = {name for _, _, name in pstats.Stats(str(output)).stats}
+    assert '_work_in_worker' in functions
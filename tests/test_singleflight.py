@@ -0,0 +1,111 @@
+"""Tests for the single-flight request coalescing group."""
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from confluence_client import ConfluenceClient
+from events import EventStream
+from singleflight import SingleFlight
+from transport import RecordingTransport, ReplayTransport
+
+
+def _run_concurrently(group, key, fn, callers, release):
+    """
+    Call group.do from several threads once the first call is in flight,
+    then set ``release`` to let the in-flight call finish.
+    """
+    started = threading.Event()
+    results = [None] * callers
+    errors = [None] * callers
+    
+    def leader_fn():
+        started.set()
+        return fn()
+    
+    def call(index):
+        try:
+            results[index] = group.do(key, leader_fn if index == 0 else fn)
+        except Exception as e:
+            errors[index] = e
+    
+    threads = [threading.Thread(target=call, args=(0,))]
+    threads[0].start()
+    started.wait()
+    threads += [threading.Thread(target=call, args=(i,)) for i in range(1, callers)]
+    for thread in threads[1:]:
+        thread.start()
+    # Give followers time to join before the leader finishes
+    while group.coalesced < callers - 1:
+        time.sleep(0.001)
+    release.set()
+    for thread in threads:
+        thread.join()
+    return results, errors
+
+
+def test_followers_share_leader_result():
+    group = SingleFlight()
+    release = threading.Event()
+    calls = []
+    result = {'key': 'A'}
+    
+    def fetch():
+        calls.append(1)
+        release.wait()
+        return result
+    
+    results, errors = _run_concurrently(group, 'space/A', fetch, callers=5, release=release)
+    
+    assert len(calls) == 1
+    assert errors == [None] * 5
+    assert all(r is result for r in results)
+    assert group.coalesced == 4
+
+
+def test_followers_raise_own_copy_of_leader_error():
+    group = SingleFlight()
+    release = threading.Event()
+    calls = []
+    
+    def fetch():
+        calls.append(1)
+        release.wait()
+        raise ValueError("boom")
+    
+    results, errors = _run_concurrently(group, 'space/A', fetch, callers=4, release=release)
+    
+    assert len(calls) == 1
+    assert results == [None] * 4
+    assert all(isinstance(e, ValueError) and str(e) == "boom" for e in errors)
+    assert len({id(e) for e in errors}) == 4
+
+
+def test_key_is_released_after_call():
+    group = SingleFlight()
+    calls = []
+    
+    def fetch():
+        calls.append(1)
+        return len(calls)
+    
+    assert group.do('k', fetch) == 1
+    assert group.do('k', fetch) == 2
+    assert group.coalesced == 0
+
+
+def test_client_does_not_coalesce_when_recording_or_replaying(tmp_path):
+    recording = tmp_path / 'run.jsonl'
+    recording.write_text('')
+    recorder = ConfluenceClient('https://example.atlassian.net', 'a', 'b', events=EventStream(),
+                                transport=lambda session: RecordingTransport(session, str(tmp_path / 'out.jsonl')))
+    replayer = ConfluenceClient(transport=ReplayTransport(str(recording)), events=EventStream())
+    live = ConfluenceClient('https://example.atlassian.net', 'a', 'b', events=EventStream())
+    
+    assert recorder._single_flight is None
+    assert replayer._single_flight is None
+    assert isinstance(live._single_flight, SingleFlight)
+    recorder.transport.close()
@@ -0,0 +1,103 @@
+"""Tests for recording and replaying HTTP exchanges."""
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+import requests
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from transport import RecordingTransport, ReplayTransport
+
+BASE_URL = 'https://example.atlassian.net/wiki/rest/api'
+
+
+class FakeSession:
+    """Session returning canned JSON responses in order."""
+    
+    def __init__(self, *bodies, status=200):
+        self.bodies = list(bodies)
+        self.status = status
+    
+    def request(self, method, url, **kwargs):
+        response = requests.Response()
+        response.status_code = self.status
+        response.reason = 'OK'
+        response.url = url
+        response.headers['Content-Type'] = 'application/json'
+        response._content = json.dumps(self.bodies.pop(0)).encode('utf-8')
+        return response
+
+
+@pytest.fixture(params=['run.jsonl', 'run.jsonl.gz'])
+def recording_path(request, tmp_path):
+    return str(tmp_path / request.param)
+
+
+def _record(path, session, calls):
+    transport = RecordingTransport(session, path)
+    for method, url, kwargs in calls:
+        transport.request(method, url, **kwargs)
+    transport.close()
+
+
+def test_json_payload_replays_for_encoded_data(recording_path):
+    payload = {'key': 'TEAM', 'name': 'Team Space'}
+    _record(recording_path, FakeSession({'id': 1, 'key': 'TEAM'}),
+            [('POST', f'{BASE_URL}/space', {'json': payload})])
+    replay = ReplayTransport(recording_path)
+    
+    # Same payload, sent as bytes with a different key order
+    data = json.dumps({'name': 'Team Space', 'key': 'TEAM'}).encode('utf-8')
+    response = replay.request('POST', f'{BASE_URL}/space', data=data)
+    
+    assert response.status_code == 200
+    assert response.json() == {'id': 1, 'key': 'TEAM'}
+
+
+def test_params_match_regardless_of_order(recording_path):
+    params = {'spaceKey': 'TEAM', 'status': 'trashed', 'start': 0}
+    _record(recording_path, FakeSession({'results': []}),
+            [('GET', f'{BASE_URL}/content', {'params': params})])
+    replay = ReplayTransport(recording_path)
+    
+    response = replay.request('GET', f'{BASE_URL}/content',
+                              params={'start': 0, 'status': 'trashed', 'spaceKey': 'TEAM'})
+    
+    assert response.json() == {'results': []}
+    with pytest.raises(requests.exceptions.ConnectionError):
+        replay.request('GET', f'{BASE_URL}/content', params={'spaceKey': 'OTHER'})
+
+
+def test_identical_requests_replay_in_recorded_order(recording_path):
+    url = f'{BASE_URL}/longtask/t1'
+    _record(recording_path,
+            FakeSession({'percentageComplete': 50}, {'percentageComplete': 100}),
+            [('GET', url, {}), ('GET', url, {})])
+    replay = ReplayTransport(recording_path)
+    
+    assert replay.request('GET', url).json() == {'percentageComplete': 50}
+    assert replay.request('GET', url).json() == {'percentageComplete': 100}
+
+
+def test_recorded_errors_are_raised_on_replay(recording_path):
+    _record(recording_path, FakeSession({'message': 'Group already exists'}, status=400),
+            [('POST', f'{BASE_URL}/group', {'json': {'name': 'standard-users'}})])
+    replay = ReplayTransport(recording_path)
+    
+    response = replay.request('POST', f'{BASE_URL}/group', json={'name': 'standard-users'})
+    
+    with pytest.raises(requests.exceptions.HTTPError) as error:
+        response.raise_for_status()
+    assert error.value.response.status_code == 400
+    assert 'Group already exists' in error.value.response.text
+
+
+def test_max_speed_replay_reports_no_elapsed_time(recording_path):
+    _record(recording_path, FakeSession({}), [('GET', f'{BASE_URL}/space/TEAM', {})])
+    
+    response = ReplayTransport(recording_path).request('GET', f'{BASE_URL}/space/TEAM')
+    
+    assert response.elapsed.total_seconds() == 0
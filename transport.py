@@ -0,0 +1,239 @@
+"""
+HTTP transports for the Confluence client
+
+This module provides the transport layer used by ConfluenceClient to send
+requests. Besides the live transport it can record request/response pairs
+with their timings to a JSONL file and replay them offline, either at the
+recorded latencies or as fast as possible.
+"""
+
+import gzip
+import json
+import threading
+import time
+from collections import defaultdict, deque
+from datetime import timedelta
+from typing import Any, Deque, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+
+def _open_text(path: str, mode: str):
+    """Open a recording file, gzip-compressed if it ends with .gz."""
+    if path.endswith('.gz'):
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+
+def _canonical_body(kwargs: Dict[str, Any]) -> Optional[str]:
+    """Return a stable representation of the request body for matching."""
+    if kwargs.get('json') is not None:
+        body = kwargs['json']
+    elif kwargs.get('data') is not None:
+        body = kwargs['data']
+        if isinstance(body, bytes):
+            body = body.decode('utf-8')
+        try:
+            body = json.loads(body)
+        except (TypeError, ValueError):
+            return str(body)
+    else:
+        return None
+    return json.dumps(body, sort_keys=True, separators=(',', ':'))
+
+
+def _request_key(method: str, url: str, kwargs: Dict[str, Any]) -> Tuple[str, str, str, Optional[str]]:
+    """Build the key a request is recorded and replayed under."""
+    parts = urlsplit(url)
+    path = parts.path + ('?' + parts.query if parts.query else '')
+    params = json.dumps(kwargs.get('params') or {}, sort_keys=True, separators=(',', ':'), default=str)
+    return method.upper(), path, params, _canonical_body(kwargs)
+
+
+class HTTPTransport:
+    """Transport that sends requests over a live requests session."""
+    
+    offline = False
+    # Whether the client may merge concurrent identical reads
+    coalesce_reads = True
+    
+    def __init__(self, session: requests.Session):
+        """
+        Initialize the transport.
+        
+        Args:
+            session: Authenticated session used to send requests
+        """
+        self.session = session
+    
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        Send a request.
+        
+        Args:
+            method: HTTP method
+            url: Full request URL
+            **kwargs: Additional arguments for requests
+        
+        Returns:
+            The response
+        """
+        return self.session.request(method, url, **kwargs)
+    
+    def sleep(self, seconds: float) -> None:
+        """
+        Wait between requests, e.g. while polling a long-running task.
+        
+        Args:
+            seconds: Number of seconds to wait
+        """
+        time.sleep(seconds)
+    
+    def close(self) -> None:
+        """Release resources held by the transport."""
+
+
+class RecordingTransport(HTTPTransport):
+    """Live transport that records every request/response pair to a file."""
+    
+    # Record every request, so a replay sees the same number of calls
+    # however the concurrent ones happen to overlap
+    coalesce_reads = False
+    
+    def __init__(self, session: requests.Session, path: str):
+        """
+        Initialize the transport.
+        
+        Args:
+            session: Authenticated session used to send requests
+            path: JSONL file to write recordings to (gzip-compressed if it ends with .gz)
+        """
+        super().__init__(session)
+        self.path = path
+        self._file = _open_text(path, 'w')
+        self._lock = threading.Lock()
+    
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """Send a request and record it together with its latency."""
+        start = time.perf_counter()
+        response = super().request(method, url, **kwargs)
+        elapsed = time.perf_counter() - start
+        
+        method, path, params, body = _request_key(method, url, kwargs)
+        entry = {
+            'method': method,
+            'path': path,
+            'params': params,
+            'body': body,
+            'status': response.status_code,
+            'reason': response.reason,
+            'content_type': response.headers.get('Content-Type'),
+            'content': response.text,
+            'elapsed': round(elapsed, 6)
+        }
+        line = json.dumps(entry, separators=(',', ':'), ensure_ascii=False)
+        with self._lock:
+            self._file.write(line + '\n')
+        return response
+    
+    def close(self) -> None:
+        """Flush and close the recording file."""
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+
+class RecordedResponse:
+    """Minimal stand-in for requests.Response built from a recording."""
+    
+    def __init__(self, entry: Dict[str, Any], url: str, elapsed: float = 0.0):
+        """
+        Initialize the response.
+        
+        Args:
+            entry: Recorded request/response entry
+            url: URL of the replayed request
+            elapsed: Seconds the replayed request took
+        """
+        self.url = url
+        self.status_code = entry['status']
+        self.reason = entry.get('reason') or ''
+        self.headers = CaseInsensitiveDict()
+        if entry.get('content_type'):
+            self.headers['Content-Type'] = entry['content_type']
+        self.text = entry.get('content') or ''
+        self.content = self.text.encode('utf-8')
+        self.elapsed = timedelta(seconds=elapsed)
+    
+    def json(self) -> Any:
+        """Decode the response body as JSON."""
+        return json.loads(self.text)
+    
+    def raise_for_status(self) -> None:
+        """Raise an HTTPError for 4xx and 5xx responses, like requests does."""
+        if 400 <= self.status_code < 600:
+            kind = 'Client' if self.status_code < 500 else 'Server'
+            raise requests.exceptions.HTTPError(
+                f"{self.status_code} {kind} Error: {self.reason} for url: {self.url}",
+                response=self
+            )
+
+
+class ReplayTransport:
+    """Offline transport that answers requests from a recording."""
+    
+    offline = True
+    coalesce_reads = False
+    
+    def __init__(self, path: str, realtime: bool = False):
+        """
+        Initialize the transport.
+        
+        Args:
+            path: JSONL recording written by RecordingTransport
+            realtime: Reproduce the recorded latencies instead of replaying at max speed
+        """
+        self.path = path
+        self.realtime = realtime
+        self._entries: Dict[Tuple, Deque[Dict[str, Any]]] = defaultdict(deque)
+        self._lock = threading.Lock()
+        
+        with _open_text(path, 'r') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                key = (entry['method'], entry['path'], entry['params'], entry['body'])
+                self._entries[key].append(entry)
+    
+    def request(self, method: str, url: str, **kwargs) -> RecordedResponse:
+        """
+        Return the next recorded response for a matching request.
+        
+        Identical requests are answered in the order they were recorded.
+        
+        Raises:
+            requests.exceptions.ConnectionError: If no recorded response is left
+        """
+        key = _request_key(method, url, kwargs)
+        with self._lock:
+            queue = self._entries.get(key)
+            entry = queue.popleft() if queue else None
+        if entry is None:
+            raise requests.exceptions.ConnectionError(f"No recorded response for {key[0]} {key[1]}")
+        
+        elapsed = 0.0
+        if self.realtime:
+            elapsed = entry.get('elapsed', 0.0)
+            time.sleep(elapsed)
+        return RecordedResponse(entry, url, elapsed)
+    
+    def sleep(self, seconds: float) -> None:
+        """Wait between requests only when replaying in real time."""
+        if self.realtime:
+            time.sleep(seconds)
+    
+    def close(self) -> None:
+        """Release resources held by the transport."""